@@ -1,40 +1,182 @@
 import streamlit as st
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from urllib.parse import urljoin, urlparse
+import aiohttp
+import diskcache
+import gspread
+import pandas as pd
+from google.oauth2.service_account import Credentials
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib.parse import urlsplit
+from collections import deque
+import asyncio
+import atexit
+import re
+import threading
 import time
 from datetime import datetime
 import subprocess
 import sys
 import os
+import pathlib
+import tempfile
 import csv
-import io
 
-# Install Playwright browsers on first run (for Streamlit Cloud)
+# Number of concurrent browser contexts used for the image-checking phase.
+# The workload is network-bound, so speedup is near-linear up to ~8-16 workers.
+CONCURRENCY = 8
+
+# Cap on in-flight image status requests across all workers. The
+# connection pool is larger (IMAGE_CHECK_POOL_SIZE) so kept-alive sockets
+# stay available even while the semaphore throttles new probes. The
+# per-host cap keeps one CDN origin from monopolising the pool while its
+# kept-alive sockets amortise the TLS handshake across that origin's images.
+IMAGE_CHECK_CONCURRENCY = 32
+IMAGE_CHECK_POOL_SIZE = 64
+IMAGE_CHECK_PER_HOST = 16
+
+# How long a cached image status stays fresh without re-checking.
+# Broken (non-200) statuses expire sooner so fixed images show up quickly.
+STATUS_CACHE_TTL = 24 * 3600
+NEGATIVE_STATUS_CACHE_TTL = 3600
+
+
+# How long a finished discovery walk is reused before re-crawling listings
+DISCOVERY_CACHE_TTL = 1800
+
+
+@st.cache_resource
+def get_status_cache():
+    """Persistent image-status cache shared across runs and restarts"""
+    return diskcache.Cache('.img_cache')
+
+
+@st.cache_resource
+def get_discovery_cache():
+    """Recent discovery results: (base_url, max_pages) -> (links, timestamp).
+
+    Streamlit reruns the script on every widget interaction; without this,
+    each rerun would repeat the 60-90s Load-More/scroll browser walk.
+    """
+    return {}
+
+
+@st.cache_resource
+def get_event_loop():
+    """Long-lived event loop on a daemon thread, shared across reruns.
+
+    Keeping one loop alive (instead of asyncio.run per scan) lets the
+    Playwright browser below survive between button clicks.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True, name='crawler-loop')
+    thread.start()
+    return loop, thread
+
+
+def run_async(coro):
+    """Run a coroutine on the persistent crawler loop and wait for it"""
+    loop, thread = get_event_loop()
+    # Attach the current session's context so st.* calls inside the
+    # coroutine render into this user's page rather than being dropped
+    add_script_run_ctx(thread, get_script_run_ctx())
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+# Trim headless Chromium down to what a crawl actually needs: no GPU,
+# extensions or background services, and /dev/shm avoided because the
+# Streamlit Cloud container gives it only 64 MB.
+_BROWSER_ARGS = [
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+]
+
+# Shared settings for every context: blocking service workers stops sites
+# from keeping caches and sync loops alive per context, and a fixed
+# viewport skips the display probe on context creation.
+_CONTEXT_OPTS = dict(
+    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    service_workers='block',
+    viewport={'width': 1280, 'height': 800},
+)
+
+
 @st.cache_resource
+def get_browser():
+    """Launch Playwright once and keep the browser warm across scans.
+
+    Browser launch costs up to seconds; creating a fresh BrowserContext
+    per scan is ~100x cheaper, so only contexts are per-run.
+    """
+    async def _launch():
+        pw = await async_playwright().start()
+        browser = await pw.chromium.launch(headless=True, args=_BROWSER_ARGS)
+        return pw, browser
+
+    pw, browser = run_async(_launch())
+
+    def _shutdown():
+        async def _close():
+            await browser.close()
+            await pw.stop()
+        try:
+            loop, _ = get_event_loop()
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=10)
+        except Exception:
+            pass  # Process is exiting anyway
+
+    atexit.register(_shutdown)
+    return browser
+
+# Install Playwright browsers on first run (for Streamlit Cloud)
+@st.cache_resource(show_spinner=False)
 def install_playwright():
     """Install Playwright browsers if not already installed"""
     try:
-        # Install chromium browser only (deps handled by packages.txt)
+        # Skip the download entirely when the browser is already on disk
+        # (warm container) - the install costs minutes, the checks are free.
+        # The sentinel marks a past successful install; the glob also covers
+        # browsers installed outside this app.
+        browser_cache = pathlib.Path.home() / '.cache' / 'ms-playwright'
+        sentinel = browser_cache / '.installed-chromium'
+        if sentinel.exists() or any(browser_cache.glob('chromium-*/chrome-linux/chrome')):
+            return True
+
+        # Install chromium browser only; --with-deps needs root and is
+        # otherwise just wasted time (deps handled by packages.txt)
+        install_cmd = [sys.executable, "-m", "playwright", "install", "chromium"]
+        if os.geteuid() == 0:
+            install_cmd.append("--with-deps")
+
         result = subprocess.run(
-            [sys.executable, "-m", "playwright", "install", "chromium", "--with-deps"],
+            install_cmd,
             capture_output=True,
             text=True,
             timeout=300,
             check=False
         )
-        
-        if result.returncode != 0:
+
+        if result.returncode != 0 and install_cmd[-1] == "--with-deps":
             # Try without --with-deps if it fails
             result = subprocess.run(
-                [sys.executable, "-m", "playwright", "install", "chromium"],
+                install_cmd[:-1],
                 capture_output=True,
                 text=True,
                 timeout=300,
                 check=False
             )
-        
-        return result.returncode == 0
-        
+
+        if result.returncode == 0:
+            # Remember the success so future cold starts skip the subprocess
+            browser_cache.mkdir(parents=True, exist_ok=True)
+            sentinel.touch()
+            return True
+
+        return False
+
     except subprocess.TimeoutExpired:
         st.error("⏱️ Playwright installation timed out. Please refresh the page.")
         return False
@@ -89,9 +231,15 @@ with st.sidebar:
     )
     
     export_to_sheets = st.checkbox(
-        "Export to CSV",
-        value=True,
-        help="Automatically download results as CSV"
+        "Export to Google Sheets",
+        value=False,
+        help="Upload results to the configured Google Sheet after the scan"
+    )
+
+    sheet_id = st.text_input(
+        "Google Sheet ID",
+        value="1k37PVPp_qKWPhn21AnstLj8GhkGng7ucf9zxMF_nOp0",
+        help="The spreadsheet key from the sheet URL (requires service account credentials in secrets)"
     )
     
     st.markdown("---")
@@ -99,377 +247,832 @@ with st.sidebar:
     st.markdown("This tool uses Playwright to render JavaScript and detect all images including lazy-loaded ones.")
 
 
-def results_to_csv(results):
-    """Convert results to CSV string"""
-    output = io.StringIO()
-    if results:
-        writer = csv.DictWriter(output, fieldnames=results[0].keys())
-        writer.writeheader()
-        writer.writerows(results)
-    return output.getvalue()
+# TTL below the 3600s OAuth token lifetime so a cached client never
+# hands out an expired bearer token
+@st.cache_resource(ttl=3000)
+def get_google_sheets_client():
+    """Build an authorized gspread client from the service account in secrets.
 
+    Cached across reruns: authorization performs a JWT sign plus an OAuth2
+    token exchange round-trip (~300ms) that need not be repeated per export.
+    """
+    credentials = Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=[
+            'https://www.googleapis.com/auth/spreadsheets',
+            'https://www.googleapis.com/auth/drive'
+        ]
+    )
+    return gspread.authorize(credentials)
 
-def is_internal_url(url, base_domain):
-    """Check if URL belongs to the same domain"""
-    parsed = urlparse(url)
-    return parsed.netloc == '' or base_domain in parsed.netloc
 
+@st.cache_resource(ttl=3000)
+def get_spreadsheet(sheet_id):
+    """Open (and cache) the target spreadsheet handle by key"""
+    return get_google_sheets_client().open_by_key(sheet_id)
 
-def extract_images_from_page(page):
-    """Extract all images from a rendered page"""
-    images = []
-    
-    # Wait for page to be fully loaded
-    page.wait_for_load_state('networkidle', timeout=30000)
-    
-    # Scroll to bottom multiple times to trigger ALL lazy loading
-    page.evaluate("""
-        async () => {
-            await new Promise((resolve) => {
-                let totalHeight = 0;
-                let distance = 300;
-                let scrollCount = 0;
-                let timer = setInterval(() => {
-                    let scrollHeight = document.body.scrollHeight;
-                    window.scrollBy(0, distance);
-                    totalHeight += distance;
-                    scrollCount++;
-                    
-                    // Scroll back up partway to trigger any viewport-based lazy loading
-                    if (scrollCount % 5 === 0) {
-                        window.scrollBy(0, -1000);
-                    }
-                    
-                    if(totalHeight >= scrollHeight * 1.5){  // Go beyond to ensure everything loads
-                        clearInterval(timer);
-                        window.scrollTo(0, 0);  // Scroll back to top
-                        resolve();
-                    }
-                }, 100);
-            });
-        }
-    """)
-    
-    # Wait for lazy images to load
-    page.wait_for_timeout(4000)
-    
-    # Scroll one more time slowly
-    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-    page.wait_for_timeout(2000)
-    
-    # Extract ALL image sources including lazy-loaded ones
-    img_data = page.evaluate("""
-        () => {
-            const images = [];
-            
-            // Get all img elements
-            document.querySelectorAll('img').forEach(img => {
-                // Check various attributes where image URLs might be
-                const src = img.src || img.getAttribute('src') || 
-                           img.getAttribute('data-src') || 
-                           img.getAttribute('data-lazy-src') ||
-                           img.getAttribute('data-original') ||
-                           img.getAttribute('data-srcset');
-                           
-                if (src && src.startsWith('http')) {
-                    images.push(src);
+
+def _sheet_cell(value):
+    """Wrap a Python value as an updateCells cell (RAW, no server parsing)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {'userEnteredValue': {'numberValue': float(value)}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
+def export_to_google_sheets(df, sheet_id, worksheet_name="Image Health Check"):
+    """Export results to Google Sheets in a single batched API call"""
+    spreadsheet = get_spreadsheet(sheet_id)
+
+    try:
+        worksheet = spreadsheet.worksheet(worksheet_name)
+    except gspread.WorksheetNotFound:
+        worksheet = spreadsheet.add_worksheet(
+            worksheet_name, rows=len(df) + 1, cols=len(df.columns)
+        )
+
+    # The Sheets API rejects NaN; values must be plain strings/numbers.
+    # astype(object) first: fillna('') on a categorical column raises
+    # because '' is not among its categories, so widen before filling.
+    df = df.astype(object).fillna('')
+
+    rows = [{'values': [_sheet_cell(c) for c in df.columns.tolist()]}]
+    rows += [{'values': [_sheet_cell(c) for c in row]} for row in df.values.tolist()]
+
+    # Header range follows the actual column count, so schema drift can't
+    # silently leave columns unformatted (the old range was hardcoded A1:E1)
+    end_col_idx = len(df.columns)
+
+    # Resize, values and header formatting in ONE batch_update round-trip.
+    # Sizing the grid to exactly the new table both guarantees the
+    # updateCells range fits and drops leftovers from earlier exports, so
+    # no separate clear() call is needed.
+    spreadsheet.batch_update({
+        'requests': [
+            {
+                'updateSheetProperties': {
+                    'properties': {
+                        'sheetId': worksheet.id,
+                        'gridProperties': {
+                            'rowCount': len(df) + 1,
+                            'columnCount': end_col_idx
+                        }
+                    },
+                    'fields': 'gridProperties(rowCount,columnCount)'
                 }
-                
-                // Also check srcset
-                const srcset = img.srcset || img.getAttribute('srcset');
-                if (srcset) {
-                    srcset.split(',').forEach(s => {
-                        const url = s.trim().split(' ')[0];
-                        if (url && url.startsWith('http')) {
-                            images.push(url);
+            },
+            {
+                'updateCells': {
+                    'start': {'sheetId': worksheet.id, 'rowIndex': 0, 'columnIndex': 0},
+                    'rows': rows,
+                    'fields': 'userEnteredValue'
+                }
+            },
+            {
+                'repeatCell': {
+                    'range': {
+                        'sheetId': worksheet.id,
+                        'startRowIndex': 0,
+                        'endRowIndex': 1,
+                        'startColumnIndex': 0,
+                        'endColumnIndex': end_col_idx
+                    },
+                    'cell': {
+                        'userEnteredFormat': {
+                            'backgroundColor': {'red': 0.9, 'green': 0.22, 'blue': 0.27},
+                            'textFormat': {
+                                'bold': True,
+                                'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}
+                            }
                         }
-                    });
+                    },
+                    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
                 }
-            });
-            
-            return images;
+            }
+        ]
+    })
+
+    return spreadsheet.url
+
+
+# Column order of the streamed results CSV; the human-readable Status and
+# the scan timestamp are derived in one vectorized pass at display time
+RESULT_COLUMNS = ['Page URL', 'Image URL', 'Status Code']
+
+STATUS_LABELS = {
+    200: '✅ OK',
+    404: '❌ NOT FOUND',
+    403: '⚠️ FORBIDDEN',
+    0: '❌ CONNECTION ERROR',
+}
+
+# Minimum seconds between updates of the same progress placeholder: every
+# update is a full Streamlit rerender round-trip, so the hot loops must
+# not emit one per page (let alone one per error)
+PROGRESS_UPDATE_INTERVAL = 0.5
+
+
+def throttled_info(placeholder, last_render, message):
+    """Update a progress placeholder at most every PROGRESS_UPDATE_INTERVAL"""
+    now = time.monotonic()
+    if now - last_render[0] >= PROGRESS_UPDATE_INTERVAL:
+        last_render[0] = now
+        placeholder.info(message)
+
+
+def normalize_base_domain(base_url):
+    """Effective domain of the crawled site, computed once per crawl"""
+    netloc = urlsplit(base_url).netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def is_internal_url(url, base_domain):
+    """Check if URL belongs to the same domain (exact or subdomain match).
+
+    Runs once per discovered image, so the host is sliced out with string
+    partitions instead of a full urlsplit — same result for the absolute
+    http(s) URLs the extractor emits, at a fraction of the cost. A suffix
+    match on '.' + domain avoids the substring pitfall where e.g. base
+    'lab.com' would also match 'evillab.com'.
+    """
+    host = url.partition('://')[2].partition('/')[0].partition('?')[0].lower()
+    return (not host
+            or host == base_domain
+            or host.endswith('.' + base_domain))
+
+
+# Helpers injected once per context via add_init_script: V8 parses and
+# compiles them a single time instead of re-parsing multi-hundred-line
+# evaluate payloads on every page visit, and each CDP message shrinks to
+# a one-line call.
+_PAGE_HELPERS_JS = """
+// Compiled once per page when the init script runs; shared by every
+// __collectImages pass (exec-to-null loops reset lastIndex, so reuse is
+// safe despite the sticky /g flag)
+const __urlRe = /url\\(["']?([^"'\\)]+)["']?\\)/g;
+
+// Trigger lazy loading with direct jumps, then wait only until image
+// loads go quiet instead of sleeping a fixed 6s: resolve once no image
+// has finished loading for 300ms (hard cap 5s for stragglers)
+window.__settleLazyImages = async () => {
+    window.scrollTo(0, document.body.scrollHeight);
+    await new Promise(r => requestAnimationFrame(r));
+    window.scrollTo(0, 0);
+    window.scrollTo(0, document.body.scrollHeight);
+
+    await new Promise((resolve) => {
+        let lastLoaded = Date.now();
+        const started = Date.now();
+
+        document.querySelectorAll('img').forEach(img => {
+            if (!img.complete) {
+                img.addEventListener('load', () => { lastLoaded = Date.now(); }, { once: true });
+                img.addEventListener('error', () => { lastLoaded = Date.now(); }, { once: true });
+            }
+        });
+
+        const timer = setInterval(() => {
+            if (Date.now() - lastLoaded > 300 || Date.now() - started > 5000) {
+                clearInterval(timer);
+                resolve();
+            }
+        }, 100);
+    });
+
+    window.scrollTo(0, 0);
+};
+
+// Collect every image URL on the page: img tags (incl. lazy/srcset
+// attributes), stylesheet background images via the CSSOM, and inline
+// style attributes - all in one call to save IPC round-trips
+window.__collectImages = () => {
+    // Dedupe at the source: a Set here halves the CDP payload on pages
+    // that repeat the same thumbnails, and Python gets unique URLs for free
+    const images = new Set();
+
+    const pushBgUrls = (bgImage) => {
+        if (!bgImage || bgImage === 'none') return;
+        let m;
+        while ((m = __urlRe.exec(bgImage)) !== null) {
+            if (m[1].startsWith('http')) {
+                images.add(m[1]);
+            }
         }
-    """)
-    
-    if img_data:
-        images.extend(img_data)
-    
-    # Also check for background images in CSS
-    bg_images = page.evaluate("""
-        () => {
-            const images = [];
-            const elements = document.querySelectorAll('*');
-            elements.forEach(el => {
-                const style = window.getComputedStyle(el);
-                const bgImage = style.backgroundImage;
-                if (bgImage && bgImage !== 'none') {
-                    const matches = bgImage.match(/url\\(["\']?([^"\'\\)]+)["\']?\\)/g);
-                    if (matches) {
-                        matches.forEach(match => {
-                            const url = match.replace(/url\\(["\']?([^"\'\\)]+)["\']?\\)/, '$1');
-                            if (url.startsWith('http')) {
-                                images.push(url);
-                            }
-                        });
-                    }
+    };
+
+    // Get all img elements
+    document.querySelectorAll('img').forEach(img => {
+        // Check various attributes where image URLs might be
+        const src = img.src || img.getAttribute('src') ||
+                   img.getAttribute('data-src') ||
+                   img.getAttribute('data-lazy-src') ||
+                   img.getAttribute('data-original') ||
+                   img.getAttribute('data-srcset');
+
+        if (src && src.startsWith('http')) {
+            images.add(src);
+        }
+
+        // Also check srcset
+        const srcset = img.srcset || img.getAttribute('srcset');
+        if (srcset) {
+            srcset.split(',').forEach(s => {
+                const url = s.trim().split(' ')[0];
+                if (url && url.startsWith('http')) {
+                    images.add(url);
                 }
             });
-            return images;
         }
-    """)
-    
-    if bg_images:
-        images.extend(bg_images)
-    
-    # Remove duplicates and data URLs
-    unique_images = list(set([img for img in images if img.startswith('http')]))
-    
-    return unique_images
+    });
 
+    // Background images from the CSS object model: walking the parsed
+    // stylesheets touches a handful of rules instead of forcing a
+    // style recalculation on every DOM node. Grouping rules
+    // (@media, @supports) nest their own cssRules, so recurse.
+    const walkRules = (rules) => {
+        for (const rule of rules || []) {
+            pushBgUrls(rule.style && rule.style.backgroundImage);
+            if (rule.cssRules) {
+                walkRules(rule.cssRules);
+            }
+        }
+    };
+
+    let blockedSheet = false;
+    for (const sheet of document.styleSheets) {
+        try {
+            walkRules(sheet.cssRules);
+        } catch (e) {
+            // Cross-origin stylesheet: cssRules access throws
+            blockedSheet = true;
+        }
+    }
+
+    // Second pass for pages whose backgrounds live in CORS-blocked
+    // stylesheets: one regex scan over the serialized markup is O(HTML
+    // bytes) and needs no style recalc. It only sees URLs present in the
+    // markup, which is enough of a safety net for broken-image monitoring.
+    if (blockedSheet) {
+        pushBgUrls(document.documentElement.outerHTML);
+    }
+
+    // Inline style="background..." attributes aren't in styleSheets
+    document.querySelectorAll('[style*="background"]').forEach(el => {
+        pushBgUrls(el.style.backgroundImage);
+    });
+
+    return [...images];
+};
+"""
+
+
+async def extract_images_from_page(page):
+    """Extract all images from a rendered page.
+
+    Relies on the _PAGE_HELPERS_JS init script installed on the worker
+    context; each evaluate call here is just a function invocation.
+    """
+    # Wait for the load event only: networkidle waits for a 500ms gap in
+    # network activity, which on ad/tracker-heavy pages can block for many
+    # seconds. The response listener catches stragglers regardless.
+    await page.wait_for_load_state('load', timeout=15000)
+    await page.wait_for_timeout(300)
+
+    await page.evaluate("() => window.__settleLazyImages()")
+
+    img_data = await page.evaluate("() => window.__collectImages()")
+
+    # __collectImages already dedupes and drops non-http entries in-page, so
+    # the list arrives unique; the set is only for downstream membership tests.
+    return set(img_data or [])
+
+
+# Paths that are never article pages. One precompiled C-level regex scan
+# per URL replaces a chain of Python substring tests in the filter loop.
+_SKIP_PATH_RE = re.compile(r'/(category|tag|author|wp-admin|wp-login|feed)(/|$)', re.I)
+
+# Resource types the discovery pass aborts at the network layer: it only
+# needs the HTML link graph, not the page's pixels
+BLOCKED_DISCOVERY_RESOURCES = {'image', 'media', 'font', 'stylesheet'}
+
+
+async def block_heavy_resources(route):
+    """Route handler aborting resources that link discovery never reads"""
+    if route.request.resource_type in BLOCKED_DISCOVERY_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
 
-def get_all_article_links(page, base_url, max_pages):
-    """Get all article links handling pagination"""
+
+async def get_all_article_links(page, base_url, max_pages, queue=None, discovered=None,
+                                checked_images=None):
+    """Get all article links, walking pagination breadth-first.
+
+    When a queue is supplied, links are produced into it the moment they
+    are found so image-check workers can start consuming immediately
+    instead of waiting for discovery to finish. When checked_images is
+    supplied, image responses that do complete during discovery are
+    recorded there so the check phase never re-fetches them.
+    """
     article_links = set()
-    
+
+    def produce(url):
+        if queue is not None:
+            queue.put_nowait(url)
+        if discovered is not None:
+            discovered[0] += 1
+
     progress_placeholder = st.empty()
-    base_domain = urlparse(base_url).netloc
-    
+    last_render = [0.0]
+    base_domain = normalize_base_domain(base_url)
+
+    # Discovery runs in its own context, so blocking here never affects the
+    # image-checking context: the workers need real image traffic because
+    # the response listener turns it into free status checks (fulfilling
+    # images with empty bodies would fake every status to 200)
+    await page.context.route("**/*", block_heavy_resources)
+
+    # Image requests are aborted above, but some image bytes still arrive
+    # (xhr/fetch payloads, resources typed differently by the site).
+    # Harvest their statuses so the check phase gets them for free.
+    if checked_images is not None:
+        status_cache = get_status_cache()
+        page.on('response', lambda r: record_image_response(r, checked_images, status_cache))
+
+    # The homepage itself is always checked; hand it out first
+    article_links.add(base_url)
+    produce(base_url)
+
+    # Iterative BFS over listing pages: a deque frontier plus a visited set
+    # scales to thousands of pagination links with no recursion depth limit,
+    # and max_pages bounds the walk instead of an arbitrary depth guard
+    frontier = deque([base_url])
+    visited = set()
+
     try:
-        # Navigate to homepage
-        page.goto(base_url, wait_until='networkidle', timeout=30000)
-        progress_placeholder.info(f"🔍 Starting discovery from homepage...")
-        
-        # Click "Load More" button multiple times to load all articles
-        load_more_clicks = 0
-        max_load_more_clicks = 20  # Prevent infinite loop
-        
-        while load_more_clicks < max_load_more_clicks:
-            try:
-                # Scroll to bottom to trigger lazy loading
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(2)
-                
-                # Look for "Load More" button with various selectors
-                load_more_button = page.query_selector('button:has-text("Load more"), a:has-text("Load more"), .load-more, button.loadmore, a.loadmore, [aria-label*="Load more"]')
-                
-                if load_more_button and load_more_button.is_visible():
-                    progress_placeholder.info(f"🔄 Loading more articles... (clicked {load_more_clicks + 1} times)")
-                    load_more_button.click()
-                    page.wait_for_timeout(3000)  # Wait for content to load
-                    load_more_clicks += 1
-                else:
-                    break  # No more "Load More" button
-            except Exception as e:
-                break  # Can't find or click button anymore
-        
-        progress_placeholder.info(f"✅ Loaded all articles (clicked Load More {load_more_clicks} times)")
-        
-        # Scroll through entire page to ensure all lazy images load
-        page.evaluate("""
-            async () => {
-                await new Promise((resolve) => {
-                    let totalHeight = 0;
-                    let distance = 200;
-                    let timer = setInterval(() => {
-                        let scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }
-        """)
-        page.wait_for_timeout(3000)
-        
-        # Now extract ALL article links from the page
-        article_links_found = page.evaluate("""
-            () => {
-                const links = new Set();
-                
-                // Find all article links - look for common WordPress article selectors
-                const selectors = [
-                    'article a[href]',
-                    '.article a[href]',
-                    '.post a[href]',
-                    '.entry a[href]',
-                    'h2 a[href]',
-                    'h3 a[href]',
-                    '.article-title a[href]',
-                    '.entry-title a[href]',
-                    '.post-title a[href]',
-                    '[class*="article"] a[href]',
-                    '[class*="post"] a[href]'
-                ];
-                
-                selectors.forEach(selector => {
-                    document.querySelectorAll(selector).forEach(a => {
-                        const href = a.href;
-                        // Only get links that look like content pages
-                        if (href && 
-                            !href.includes('#') && 
-                            !href.includes('javascript:') &&
-                            !href.includes('/category/') &&
-                            !href.includes('/tag/') &&
-                            !href.includes('/author/') &&
-                            href.length > 10) {
-                            links.add(href);
+        while frontier and len(article_links) < max_pages:
+            listing_url = frontier.popleft()
+            if listing_url in visited:
+                continue
+            visited.add(listing_url)
+
+            await page.goto(listing_url, wait_until='domcontentloaded', timeout=30000)
+            throttled_info(progress_placeholder, last_render,
+                           f"🔍 Discovering articles ({len(article_links)} found, {len(frontier)} listing pages queued)...")
+
+            # Click "Load More" button multiple times to load all articles
+            load_more_clicks = 0
+            max_load_more_clicks = 20  # Prevent infinite loop
+
+            while load_more_clicks < max_load_more_clicks:
+                try:
+                    # Scroll to bottom to trigger lazy loading
+                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    await page.wait_for_timeout(2000)
+
+                    # Look for "Load More" button with various selectors
+                    load_more_button = await page.query_selector('button:has-text("Load more"), a:has-text("Load more"), .load-more, button.loadmore, a.loadmore, [aria-label*="Load more"]')
+
+                    if load_more_button and await load_more_button.is_visible():
+                        throttled_info(progress_placeholder, last_render,
+                                       f"🔄 Loading more articles... (clicked {load_more_clicks + 1} times)")
+                        # Wait for the AJAX response the click triggers
+                        # instead of a fixed 3s: continues as soon as the
+                        # server answers, typically a few hundred ms
+                        try:
+                            async with page.expect_response(
+                                lambda r: r.request.resource_type in ('xhr', 'fetch'),
+                                timeout=10000,
+                            ):
+                                await load_more_button.click()
+                        except PlaywrightTimeout:
+                            # Button navigated or appended inline without an
+                            # AJAX call; give the DOM a moment to settle
+                            await page.wait_for_load_state('domcontentloaded',
+                                                           timeout=5000)
+                        load_more_clicks += 1
+                    else:
+                        break  # No more "Load More" button
+                except Exception as e:
+                    break  # Can't find or click button anymore
+
+            # Jump to the bottom until the document stops growing (covers
+            # infinite-scroll listings) instead of crawling down 200px per
+            # 100ms and then sleeping a fixed 3s
+            await page.evaluate("""
+                async () => {
+                    const started = Date.now();
+                    let lastHeight = document.body.scrollHeight;
+                    let lastGrowth = Date.now();
+
+                    while (Date.now() - lastGrowth < 500 && Date.now() - started < 8000) {
+                        window.scrollTo(0, document.body.scrollHeight);
+                        await new Promise(r => setTimeout(r, 100));
+                        const height = document.body.scrollHeight;
+                        if (height > lastHeight) {
+                            lastHeight = height;
+                            lastGrowth = Date.now();
                         }
+                    }
+
+                    window.scrollTo(0, 0);
+                }
+            """)
+
+            # Extract article links plus pagination links to feed the frontier
+            found = await page.evaluate("""
+                () => {
+                    const links = new Set();
+
+                    // Find all article links - look for common WordPress article selectors
+                    const selectors = [
+                        'article a[href]',
+                        '.article a[href]',
+                        '.post a[href]',
+                        '.entry a[href]',
+                        'h2 a[href]',
+                        'h3 a[href]',
+                        '.article-title a[href]',
+                        '.entry-title a[href]',
+                        '.post-title a[href]',
+                        '[class*="article"] a[href]',
+                        '[class*="post"] a[href]'
+                    ];
+
+                    selectors.forEach(selector => {
+                        document.querySelectorAll(selector).forEach(a => {
+                            const href = a.href;
+                            // Only get links that look like content pages
+                            if (href &&
+                                !href.includes('#') &&
+                                !href.includes('javascript:') &&
+                                !href.includes('/category/') &&
+                                !href.includes('/tag/') &&
+                                !href.includes('/author/') &&
+                                href.length > 10) {
+                                links.add(href);
+                            }
+                        });
                     });
-                });
-                
-                return Array.from(links);
-            }
-        """)
-        
-        # Filter for internal links only
-        for link in article_links_found:
-            if is_internal_url(link, base_domain):
-                article_links.add(link)
-        
-        # Also add the homepage itself
-        article_links.add(base_url)
-        
+
+                    // Numbered pagination / next links to keep the walk going
+                    const pagination = new Set();
+                    const pageSelectors = [
+                        '.pagination a[href]',
+                        '.nav-links a[href]',
+                        'a.page-numbers[href]',
+                        'a[rel="next"]',
+                        'a[href*="/page/"]'
+                    ];
+
+                    pageSelectors.forEach(selector => {
+                        document.querySelectorAll(selector).forEach(a => {
+                            const href = a.href;
+                            if (href && !href.includes('#') && !href.includes('javascript:')) {
+                                pagination.add(href);
+                            }
+                        });
+                    });
+
+                    return {
+                        articles: Array.from(links),
+                        pagination: Array.from(pagination)
+                    };
+                }
+            """)
+
+            # Filter for internal article-looking links only: the shared
+            # partition-based host check plus one regex scan per URL, no
+            # urlsplit in the loop. Scanning the full URL is safe because
+            # hostnames cannot contain '/'.
+            for link in found['articles']:
+                if link in article_links or len(article_links) >= max_pages:
+                    continue
+                if (is_internal_url(link, base_domain)
+                        and not _SKIP_PATH_RE.search(link)):
+                    article_links.add(link)
+                    produce(link)
+
+            for link in found['pagination']:
+                if link not in visited and is_internal_url(link, base_domain):
+                    frontier.append(link)
+
         progress_placeholder.success(f"✅ Discovery complete! Found {len(article_links)} pages to check")
-        
+
         if len(article_links) <= 1:
             progress_placeholder.warning(f"⚠️ Only found homepage. This might indicate an issue with article detection. Will check homepage thoroughly.")
-        
+
         return list(article_links)[:max_pages]
-        
+
     except Exception as e:
         progress_placeholder.error(f"❌ Error during discovery: {str(e)}")
-        return [base_url]  # At minimum, return homepage
+        return list(article_links) or [base_url]  # At minimum, return homepage
+
 
+def _suspicious_content_type(response):
+    """True when a 200 response clearly isn't serving image bytes"""
+    content_type = response.headers.get('content-type', '').lower()
+    return (content_type
+            and 'image' not in content_type
+            and 'octet-stream' not in content_type)
 
-def check_image_status(page, image_url):
-    """Check HTTP status of an image with better error handling"""
+
+async def probe_image(session, sem, image_url, etag=None):
+    """Check HTTP status of a single image without downloading its body.
+
+    Tiered probe: HEAD first; if the server rejects it (some image CDNs
+    return 405), fall back to a ranged GET asking for a single byte, so at
+    most one byte of a possibly multi-MB image ever crosses the wire.
+
+    Returns (status, etag). A 304 means the cached entry is still valid.
+    """
     try:
         # Validate URL first
         if not image_url or not image_url.startswith('http'):
-            return 0  # Invalid URL
-        
-        # Check with shorter timeout to speed things up
-        response = page.request.get(image_url, timeout=15000)
-        status = response.status
-        
-        # Additional check: if it's 200 but content-type is not an image, mark as suspicious
-        if status == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            if content_type and 'image' not in content_type and 'octet-stream' not in content_type:
-                # It's returning HTML or something else, not an image
-                return 404  # Treat as not found
-        
-        return status
-        
-    except Exception as e:
-        error_str = str(e).lower()
-        
-        # Categorize errors
-        if 'timeout' in error_str or 'timed out' in error_str:
-            return 0  # Timeout
-        elif '404' in error_str:
-            return 404
-        elif '403' in error_str:
-            return 403
-        elif '500' in error_str or '502' in error_str or '503' in error_str:
-            return 500
-        else:
-            return 0  # Generic connection error
+            return 0, None  # Invalid URL
 
+        headers = {'If-None-Match': etag} if etag else {}
+
+        async with sem:
+            async with session.head(image_url, allow_redirects=True, headers=headers or None,
+                                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                status = response.status
+
+                if status in (405, 501):
+                    # Server rejects HEAD; ask for one byte instead. CDNs
+                    # answer 206 (or 200 if Range is ignored) - both mean OK.
+                    range_headers = dict(headers, Range='bytes=0-0')
+                    async with session.get(image_url, allow_redirects=True, headers=range_headers,
+                                           timeout=aiohttp.ClientTimeout(total=10)) as get_response:
+                        get_status = get_response.status
+                        if get_status == 206:
+                            get_status = 200
+                        if get_status == 200 and _suspicious_content_type(get_response):
+                            return 404, None
+                        return get_status, get_response.headers.get('ETag')
+
+                # Additional check: if it's 200 but content-type is not an image, mark as suspicious
+                if status == 200 and _suspicious_content_type(response):
+                    # It's returning HTML or something else, not an image
+                    return 404, None  # Treat as not found
+
+                return status, response.headers.get('ETag')
+
+    except asyncio.TimeoutError:
+        return 0, None  # Timeout
+    except Exception:
+        return 0, None  # Generic connection error
+
+
+def _cached_status(cache, url, now):
+    """Return (fresh_status, stale_etag) from the persistent cache"""
+    entry = cache.get(url)
+    if not entry:
+        return None, None
+
+    ttl = STATUS_CACHE_TTL if entry['status'] == 200 else NEGATIVE_STATUS_CACHE_TTL
+    if now - entry['ts'] < ttl:
+        return entry['status'], None
+
+    # Stale: keep the ETag so the re-check can be a cheap conditional request
+    return None, entry.get('etag')
+
+
+async def check_image_batch(session, sem, urls, checked_images, cache_lock):
+    """Probe a batch of image URLs concurrently and memoize the results.
+
+    Fresh entries in the persistent cache are reused without any network
+    traffic; stale entries with an ETag are revalidated conditionally.
+    """
+    cache = get_status_cache()
+    now = time.time()
+
+    to_check = []
+    for url in urls:
+        if url in checked_images:
+            continue
+        status, stale_etag = _cached_status(cache, url, now)
+        if status is not None:
+            checked_images[url] = status
+            continue
+        to_check.append((url, stale_etag))
+
+    if not to_check:
+        return
+
+    probes = await asyncio.gather(
+        *(probe_image(session, sem, url, etag) for url, etag in to_check)
+    )
+
+    async with cache_lock:
+        # One SQLite transaction for the whole batch instead of a commit
+        # per URL (diskcache is SQLite-backed)
+        with cache.transact():
+            for (url, stale_etag), (status, new_etag) in zip(to_check, probes):
+                if status == 304:
+                    # Unchanged since last check: refresh the cached entry's TTL
+                    entry = cache.get(url) or {'status': 200, 'etag': stale_etag}
+                    entry['ts'] = now
+                    cache.set(url, entry)
+                    checked_images[url] = entry['status']
+                else:
+                    checked_images[url] = status
+                    # Connection errors (status 0) are transient; don't persist them
+                    if status != 0:
+                        cache.set(url, {'status': status, 'etag': new_etag, 'ts': now})
+
+
+def record_image_response(response, checked_images, cache):
+    """Response listener: harvest image statuses from the page's own traffic.
+
+    Every image the browser fetches while rendering already carries its
+    status code, so it never needs a separate probe request.
+    """
+    try:
+        if not response.headers.get('content-type', '').startswith('image/'):
+            return
+        url = response.url
+        if url.startswith('http') and url not in checked_images:
+            checked_images[url] = response.status
+            cache.set(url, {
+                'status': response.status,
+                'etag': response.headers.get('etag'),
+                'ts': time.time()
+            })
+    except Exception:
+        pass  # Never let bookkeeping break page rendering
+
+
+async def page_check_worker(context, queue, result_writer, checked_images, base_domain,
+                            include_external, progress_state, session, sem, cache_lock,
+                            errors):
+    """Worker coroutine: renders pages from the queue and checks their images.
+
+    All workers share one BrowserContext and own a Page each: pages still
+    render concurrently, but per-context memory (cookie jar, cache,
+    service-worker state) is paid once instead of once per worker, which
+    matters under Streamlit Cloud's 1 GB cap.
+    """
+    progress_bar, status_text, discovered, completed, last_render = progress_state
+    page = await context.new_page()
+
+    # Register before any navigation so every rendered image is captured
+    status_cache = get_status_cache()
+    page.on('response', lambda r: record_image_response(r, checked_images, status_cache))
+
+    try:
+        while True:
+            page_url = await queue.get()
+            if page_url is None:
+                break  # Sentinel: discovery finished and the queue drained
+
+            completed[0] += 1
+            progress_bar.progress(min(completed[0] / max(discovered[0], 1), 1.0))
+
+            # Extract page title for better progress display
+            page_title = page_url.split('/')[-2] if page_url.endswith('/') else page_url.split('/')[-1]
+            throttled_info(status_text, last_render,
+                           f"📄 Checking page {completed[0]}/{discovered[0]}: {page_title}")
+
+            try:
+                await page.goto(page_url, wait_until='domcontentloaded', timeout=30000)
+                images = await extract_images_from_page(page)
+
+                throttled_info(status_text, last_render,
+                               f"🖼️ Found {len(images)} images on this page, checking status...")
+
+                # extract_images_from_page only emits absolute http(s) URLs
+                # (img.src and friends are resolved by the browser), so no
+                # per-occurrence urljoin pass is needed - just the filter
+                if include_external:
+                    page_img_urls = images
+                else:
+                    page_img_urls = {u for u in images
+                                     if is_internal_url(u, base_domain)}
+
+                # Probe all not-yet-seen images for this page concurrently
+                await check_image_batch(session, sem, page_img_urls, checked_images, cache_lock)
+
+                for full_img_url in page_img_urls:
+                    result_writer.writerow([
+                        page_url,
+                        full_img_url,
+                        checked_images.get(full_img_url, 0)
+                    ])
+
+            except Exception as e:
+                # Deferred: a st.warning here would block the crawl on a
+                # rerender per failure; errors are shown once at the end
+                errors.append((page_url, str(e)))
+                continue
+    finally:
+        await page.close()
+
+
+async def crawl_and_check_images_async(browser, base_url, max_pages, include_external,
+                                       result_writer):
+    """Main crawling coroutine; streams result rows into result_writer.
+
+    The browser is owned by get_browser() and stays warm across scans;
+    this coroutine only creates (and closes) contexts on it.
+    """
+    context = await browser.new_context(**_CONTEXT_OPTS)
+    page = await context.new_page()
+
+    # Progress tracking
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    # Discovery produces links into the queue while the check workers
+    # consume them, so the two network-bound phases overlap and total
+    # wall time is roughly max(discover, check) instead of their sum
+    status_text.info("🔍 Discovering article pages and checking images...")
+
+    base_domain = normalize_base_domain(base_url)
+    checked_images = {}  # Cache to avoid checking same image multiple times
+    cache_lock = asyncio.Lock()
+    sem = asyncio.Semaphore(IMAGE_CHECK_CONCURRENCY)
+
+    queue = asyncio.Queue()
+    discovered = [0]  # Links produced so far (single event loop, no lock needed)
+    completed = [0]   # Pages checked so far
+    last_render = [0.0]
+    progress_state = (progress_bar, status_text, discovered, completed, last_render)
+    errors = []
+
+    # One context for the whole worker pool; each worker opens its own page
+    worker_context = await browser.new_context(**_CONTEXT_OPTS)
+    # Compile the page helpers once for every page this context opens
+    await worker_context.add_init_script(_PAGE_HELPERS_JS)
+
+    # One HTTP session (connection pool + DNS cache) shared by every worker
+    connector = aiohttp.TCPConnector(limit=IMAGE_CHECK_POOL_SIZE,
+                                     limit_per_host=IMAGE_CHECK_PER_HOST,
+                                     ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        workers = [
+            asyncio.create_task(page_check_worker(
+                worker_context, queue, result_writer, checked_images, base_domain,
+                include_external, progress_state, session, sem, cache_lock,
+                errors
+            ))
+            for _ in range(CONCURRENCY)
+        ]
 
-def crawl_and_check_images(base_url, max_pages, include_external):
-    """Main crawling function"""
-    results = []
-    
-    with sync_playwright() as p:
-        # Launch browser
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = context.new_page()
-        
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
         try:
-            # Step 1: Get all article links
-            status_text.info("🔍 Step 1/2: Discovering all article pages...")
-            article_links = get_all_article_links(page, base_url, max_pages)
-            
-            if not article_links:
-                st.warning("No article links found. Adding homepage to crawl list.")
-                article_links = [base_url]
-            
-            total_pages = min(len(article_links), max_pages)
-            
-            # Step 2: Check images on each page
-            status_text.info("🖼️ Step 2/2: Checking images on all pages...")
-            
-            base_domain = urlparse(base_url).netloc
-            checked_images = {}  # Cache to avoid checking same image multiple times
-            
-            for idx, page_url in enumerate(article_links[:max_pages]):
-                progress = (idx + 1) / total_pages
-                progress_bar.progress(progress)
-                
-                # Extract page title for better progress display
-                page_title = page_url.split('/')[-2] if page_url.endswith('/') else page_url.split('/')[-1]
-                status_text.info(f"📄 Checking page {idx + 1}/{total_pages}: {page_title}")
-                
-                try:
-                    page.goto(page_url, wait_until='networkidle', timeout=30000)
-                    images = extract_images_from_page(page)
-                    
-                    status_text.info(f"🖼️ Found {len(images)} images on this page, checking status...")
-                    
-                    for img_url in images:
-                        # Convert relative URLs to absolute
-                        full_img_url = urljoin(page_url, img_url)
-                        
-                        # Skip if we should ignore external images
-                        if not include_external and not is_internal_url(full_img_url, base_domain):
-                            continue
-                        
-                        # Check if we've already checked this image
-                        if full_img_url in checked_images:
-                            status_code = checked_images[full_img_url]
-                        else:
-                            status_code = check_image_status(page, full_img_url)
-                            checked_images[full_img_url] = status_code
-                        
-                        # Determine status
-                        if status_code == 200:
-                            status = "✅ OK"
-                        elif status_code == 404:
-                            status = "❌ NOT FOUND"
-                        elif status_code == 403:
-                            status = "⚠️ FORBIDDEN"
-                        elif status_code == 0:
-                            status = "❌ CONNECTION ERROR"
-                        else:
-                            status = f"⚠️ ERROR {status_code}"
-                        
-                        results.append({
-                            'Page URL': page_url,
-                            'Image URL': full_img_url,
-                            'Status Code': status_code,
-                            'Status': status,
-                            'Checked At': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        })
-                
-                except Exception as e:
-                    st.warning(f"Error processing {page_url}: {str(e)}")
-                    continue
-        
+            discovery_cache = get_discovery_cache()
+            cached = discovery_cache.get((base_url, max_pages))
+
+            if cached and time.time() - cached[1] < DISCOVERY_CACHE_TTL:
+                # Fresh discovery from a recent run: feed the queue directly
+                # and skip the browser walk entirely
+                for url in cached[0]:
+                    queue.put_nowait(url)
+                    discovered[0] += 1
+                await context.close()
+            else:
+                article_links = await get_all_article_links(
+                    page, base_url, max_pages, queue=queue, discovered=discovered,
+                    checked_images=checked_images
+                )
+                await context.close()
+                if len(article_links) > 1:
+                    discovery_cache[(base_url, max_pages)] = (article_links, time.time())
         finally:
-            browser.close()
-    
-    return results
+            # One sentinel per worker so every consumer wakes and exits
+            for _ in workers:
+                queue.put_nowait(None)
+
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            await worker_context.close()
+
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} pages could not be processed"):
+            st.dataframe(pd.DataFrame(errors, columns=['URL', 'Error']))
+
+
+def crawl_and_check_images(base_url, max_pages, include_external):
+    """Main crawling function.
+
+    Streams result rows straight to a CSV on disk so memory stays bounded
+    regardless of scan size; returns the path of the results file.
+    """
+    browser = get_browser()
+
+    tmp = tempfile.NamedTemporaryFile(
+        'w', newline='', delete=False, suffix='.csv', prefix='image_health_'
+    )
+    try:
+        result_writer = csv.writer(tmp)
+        result_writer.writerow(RESULT_COLUMNS)
+        run_async(crawl_and_check_images_async(
+            browser, base_url, max_pages, include_external, result_writer
+        ))
+    finally:
+        tmp.close()
+
+    return tmp.name
 
 
 # Main execution
@@ -484,63 +1087,102 @@ if st.button("🚀 Start Image Health Check", type="primary", disabled=not playw
         start_time = time.time()
         
         with st.spinner("Initializing crawler..."):
-            results = crawl_and_check_images(base_url, max_pages, include_external)
-        
+            results_path = crawl_and_check_images(base_url, max_pages, include_external)
+
         elapsed_time = time.time() - start_time
-        
-        if results:
+
+        # The crawl streamed rows to disk; load them back only for display
+        df = pd.read_csv(results_path)
+
+        # Derive presentation columns in one vectorized pass instead of a
+        # Python if/elif chain per row during the crawl
+        df['Status'] = df['Status Code'].map(STATUS_LABELS)
+        df['Status'] = df['Status'].fillna('⚠️ ERROR ' + df['Status Code'].astype(str))
+        df['Checked At'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        # Compact dtypes: Page URL and Status repeat heavily (shared header
+        # images, a handful of labels), so category storage keeps one copy
+        # of each distinct string instead of one per row
+        df['Page URL'] = df['Page URL'].astype('category')
+        df['Status'] = df['Status'].astype('category')
+        df['Status Code'] = df['Status Code'].astype('int16')
+
+        if not df.empty:
             # Display summary metrics
             st.markdown("---")
             st.subheader("📊 Scan Results")
-            
+
             col1, col2, col3, col4 = st.columns(4)
-            
-            total_images = len(results)
-            ok_images = len([r for r in results if r['Status Code'] == 200])
-            broken_images = len([r for r in results if r['Status Code'] != 200])
+
+            total_images = len(df)
+            ok_images = int((df['Status Code'] == 200).sum())
+            broken_images = total_images - ok_images
             success_rate = (ok_images / total_images * 100) if total_images > 0 else 0
-            
+
             col1.metric("Total Images", total_images)
             col2.metric("✅ Working", ok_images)
             col3.metric("❌ Broken", broken_images)
             col4.metric("Success Rate", f"{success_rate:.1f}%")
-            
+
             st.info(f"⏱️ Scan completed in {elapsed_time:.1f} seconds")
-            
+
             # Display results table
             st.markdown("---")
             st.subheader("🔍 All Results")
-            st.dataframe(
-                results,
-                use_container_width=True,
-                height=400
-            )
-            
+            # No fixed height: Streamlit virtualizes the grid and only
+            # renders the rows in view
+            st.dataframe(df, use_container_width=True)
+
             # Show broken images separately for easy reference
             if broken_images > 0:
                 st.markdown("---")
                 st.subheader("❌ Broken Images Details")
-                broken_results = [r for r in results if r['Status Code'] != 200]
-                
-                for row in broken_results:
-                    with st.expander(f"❌ {row['Status']} - {row['Image URL'][:80]}..."):
-                        st.write("**Page:**", row['Page URL'])
-                        st.write("**Image URL:**", row['Image URL'])
-                        st.write("**Status Code:**", row['Status Code'])
-                        st.write("**Status:**", row['Status'])
-                        st.code(row['Image URL'], language=None)
-            
+                broken_df = df[df['Status Code'] != 200]
+
+                # Fragment: flipping the page re-renders only this section
+                # instead of re-running the whole script, and the browser
+                # holds at most one page of expander widgets at a time
+                @st.fragment
+                def broken_images_section(broken_df, page_size=50):
+                    max_page = (len(broken_df) - 1) // page_size + 1
+                    page = 1
+                    if max_page > 1:
+                        page = st.number_input(
+                            f"Page (of {max_page})", min_value=1,
+                            max_value=max_page, value=1
+                        )
+                    page_df = broken_df.iloc[(page - 1) * page_size:page * page_size]
+                    for row in page_df.to_dict('records'):
+                        with st.expander(f"❌ {row['Status']} - {row['Image URL'][:80]}..."):
+                            st.write("**Page:**", row['Page URL'])
+                            st.write("**Image URL:**", row['Image URL'])
+                            st.write("**Status Code:**", row['Status Code'])
+                            st.write("**Status:**", row['Status'])
+                            st.code(row['Image URL'], language=None)
+
+                broken_images_section(broken_df)
+
             # Export options
             st.markdown("---")
             st.subheader("💾 Export Results")
-            
-            csv_data = results_to_csv(results)
+
             st.download_button(
                 label="📥 Download as CSV",
-                data=csv_data,
+                data=df.to_csv(index=False).encode(),
                 file_name=f"image_health_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
+
+            if export_to_sheets:
+                if not sheet_id:
+                    st.error("Please enter a Google Sheet ID in the sidebar")
+                else:
+                    with st.spinner("📊 Exporting to Google Sheets..."):
+                        try:
+                            sheet_url = export_to_google_sheets(df, sheet_id)
+                            st.success(f"✅ Exported to [Google Sheet]({sheet_url})")
+                        except Exception as e:
+                            st.error(f"❌ Google Sheets export failed: {str(e)}")
         else:
             st.warning("No images found during the scan.")
 